@@ -13,13 +13,10 @@ streamlit run fund_admin_pricing_app.py
 
 import streamlit as st
 import plotly.graph_objects as go
-import plotly.express as px
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional
-import json
+from typing import List, Dict
 
 # ──────────────────────────────────────────────────────────────────────
 # PAGE CONFIG & THEME
@@ -191,6 +188,11 @@ SERVICE_MODULES = {
     "ESG / SFDR Reporting":  {"bps": 0.55,"required": False, "desc": "SFDR Art 8/9, PAI indicators, taxonomy"},
 }
 
+# Derived once from the service catalogue rather than re-filtered at
+# each widget that needs the split.
+REQUIRED_SERVICES = [k for k, v in SERVICE_MODULES.items() if v["required"]]
+OPTIONAL_SERVICES = [k for k, v in SERVICE_MODULES.items() if not v["required"]]
+
 VOLUME_TIERS = [
     (0,     500,    0.00),
     (500,   2000,   0.08),
@@ -208,15 +210,35 @@ NEGOTIATION_SCENARIOS = {
 
 NAV_FREQ_MULTIPLIER = {"Daily": 1.0, "Weekly": 0.85, "Monthly": 0.70}
 
+MIN_FEE_MN = 0.05        # $50K annual minimum fee
+COST_PER_HEAD_MN = 0.085 # $85K fully-loaded per FTE, Ireland-based
+
 # ──────────────────────────────────────────────────────────────────────
 # PRICING ENGINE
 # ──────────────────────────────────────────────────────────────────────
 
-def get_volume_discount(aum_mn: float) -> float:
+# Tier boundaries as numpy arrays so lookups stay inside C kernels and
+# work on whole AUM arrays as well as scalars.
+VOLUME_TIER_EDGES = np.array([lo for lo, _, _ in VOLUME_TIERS[1:]])
+VOLUME_TIER_DISCOUNTS = np.array([disc for _, _, disc in VOLUME_TIERS])
+
+def _tier_rows():
+    rows = []
     for lo, hi, disc in VOLUME_TIERS:
-        if lo <= aum_mn < hi:
-            return disc
-    return VOLUME_TIERS[-1][2]
+        hi_label = f"${hi/1000:.0f}B" if hi >= 1000 and hi < 1e9 else (f"${hi:.0f}M" if hi < 1000 else "∞")
+        lo_label = f"${lo/1000:.0f}B" if lo >= 1000 else f"${lo:.0f}M"
+        rows.append((f"{lo_label} – {hi_label}", f"{disc*100:.0f}%" if disc > 0 else "—"))
+    return rows
+
+# Static display rows for the discount schedule table; only the CURRENT
+# marker depends on the configured AUM.
+VOLUME_TIER_ROWS = _tier_rows()
+
+def get_volume_discount(aum_mn):
+    """Volume discount for a scalar AUM ($M) or an array of AUMs."""
+    idx = np.searchsorted(VOLUME_TIER_EDGES, aum_mn, side="right")
+    disc = VOLUME_TIER_DISCOUNTS[idx]
+    return float(disc) if np.isscalar(aum_mn) else disc
 
 def calculate_pricing(
     fund_type: str,
@@ -262,15 +284,13 @@ def calculate_pricing(
     effective_bps = total_bps * (1 - final_disc)
 
     # Revenue (with minimum floor)
-    min_fee_mn = 0.05  # $50K
     raw_revenue = (aum_mn * effective_bps) / 10_000
-    annual_revenue = max(raw_revenue, min_fee_mn)
-    min_fee_applied = raw_revenue < min_fee_mn
+    annual_revenue = max(raw_revenue, MIN_FEE_MN)
+    min_fee_applied = raw_revenue < MIN_FEE_MN
 
     # Cost estimation
     headcount = max(1, int(np.ceil(aum_mn / 800))) + (1 if complexity > 1.3 else 0) + len(selected_services) // 3
-    cost_per_head = 0.085  # $85K
-    annual_cost = headcount * cost_per_head
+    annual_cost = headcount * COST_PER_HEAD_MN
 
     margin = (annual_revenue - annual_cost) / annual_revenue if annual_revenue > 0 else 0
     contract_value = annual_revenue * term_years
@@ -293,6 +313,61 @@ def calculate_pricing(
         "term_years": term_years,
     }
 
+@st.cache_data
+def sensitivity_frame(
+    fund_type: str,
+    aum_points: List[float],
+    selected_services: List[str],
+    scenario: str = "Standard",
+    custom_discount_pct: float = 0.0,
+    share_classes: int = 3,
+    nav_frequency: str = "Daily",
+    term_years: int = 3,
+) -> pd.DataFrame:
+    """AUM sweep of the pricing engine as a single vectorized pass.
+
+    Only the volume discount, headcount, and minimum-fee floor depend on
+    AUM — everything else is shared across the sweep — so the whole curve
+    reduces to numpy array arithmetic over the AUM axis instead of one
+    `calculate_pricing` call per point.
+    """
+    ref = calculate_pricing(fund_type, float(aum_points[0]), selected_services,
+                            scenario, custom_discount_pct, share_classes,
+                            nav_frequency, term_years)
+    aum = np.asarray(aum_points, dtype=np.float64)
+    vol_disc = get_volume_discount(aum)
+    custom_disc = custom_discount_pct / 100.0
+    combined = 1 - (1 - vol_disc) * (1 - ref["nego_discount"]) * (1 - custom_disc)
+    final = 1 - (1 - combined) * (1 - ref["term_discount"])
+    effective_bps = ref["gross_bps"] * (1 - final)
+
+    revenue = np.maximum(aum * effective_bps / 10_000, MIN_FEE_MN)
+    complexity = FUND_TYPES[fund_type]["complexity"]
+    headcount = (np.maximum(1, np.ceil(aum / 800).astype(np.int64))
+                 + (1 if complexity > 1.3 else 0)
+                 + len(selected_services) // 3)
+    cost = headcount * COST_PER_HEAD_MN
+    margin = np.where(revenue > 0, (revenue - cost) / revenue, 0.0)
+
+    return pd.DataFrame({
+        "AUM ($M)": aum_points,
+        "Annual Revenue ($M)": np.round(revenue, 4),
+        "Effective Rate (bps)": np.round(effective_bps, 3),
+        "Margin": np.round(margin, 4),
+        "Headcount": headcount,
+    })
+
+@st.cache_data
+def price_portfolio(portfolio: List[dict]) -> List[dict]:
+    """Price every fund in a portfolio; memoized on its configuration."""
+    return [
+        {"fund": fund,
+         "pricing": calculate_pricing(
+             fund["type"], fund["aum"], fund["services"], fund["scenario"],
+             0.0, fund["classes"], fund["freq"], fund["term"])}
+        for fund in portfolio
+    ]
+
 # ──────────────────────────────────────────────────────────────────────
 # FORMATTING HELPERS
 # ──────────────────────────────────────────────────────────────────────
@@ -319,6 +394,32 @@ def narrative(text: str):
 def section_header(icon: str, title: str):
     st.markdown(f'<div class="section-header">{icon} {title}</div>', unsafe_allow_html=True)
 
+@st.cache_data
+def scenario_cards_html(scenario_results: Dict[str, dict]) -> str:
+    """Render the negotiation scenario cards; memoized on the pricing results."""
+    cards = []
+    for sc_name, sc_info in NEGOTIATION_SCENARIOS.items():
+        p = scenario_results[sc_name]
+        border_color = sc_info["color"]
+        cards.append(f"""
+        <div style="flex:1; background:#111827; border:1px solid #1e293b; border-top:3px solid {border_color};
+                    border-radius:10px; padding:18px; text-align:center;">
+            <div style="font-size:0.85rem; font-weight:700; color:{border_color}; margin-bottom:10px;">
+                {sc_name}
+            </div>
+            <div style="font-size:1.4rem; font-weight:700; color:#e2e8f0;
+                        font-family:'JetBrains Mono',monospace; margin-bottom:4px;">
+                {fmt_usd(p['annual_revenue_mn'])}
+            </div>
+            <div style="font-size:0.78rem; color:#94a3b8; margin-bottom:6px;">
+                {fmt_bps(p['effective_bps'])} · {fmt_pct(p['margin'])} margin
+            </div>
+            <div style="font-size:0.72rem; color:#64748b;">
+                Contract: {fmt_usd(p['contract_value_mn'])}
+            </div>
+        </div>""")
+    return '<div style="display:flex; gap:16px;">' + "".join(cards) + "</div>"
+
 def plotly_dark_layout(fig, height=350):
     fig.update_layout(
         template="plotly_dark",
@@ -333,6 +434,74 @@ def plotly_dark_layout(fig, height=350):
     fig.update_yaxes(gridcolor=THEME["border"], zerolinecolor=THEME["border"])
     return fig
 
+@st.cache_data
+def discount_waterfall_fig(pricing: dict, custom_discount: float) -> go.Figure:
+    """Discount waterfall for tab 1; memoized on the pricing output."""
+    waterfall_items = [
+        ("Gross Rate", pricing["gross_bps"], THEME["muted"]),
+        (f"Volume Discount ({fmt_pct(pricing['volume_discount'])})",
+         -pricing["gross_bps"] * pricing["volume_discount"], THEME["cyan"]),
+        (f"Negotiation ({fmt_pct(pricing['nego_discount'])})",
+         -pricing["gross_bps"] * (1 - pricing["volume_discount"]) * pricing["nego_discount"],
+         THEME["amber"]),
+    ]
+    if custom_discount > 0:
+        waterfall_items.append((
+            f"Custom ({custom_discount}%)",
+            -pricing["gross_bps"] * (custom_discount / 100) * 0.5,
+            THEME["purple"],
+        ))
+    if pricing["term_discount"] > 0:
+        waterfall_items.append((
+            f"Term Discount ({fmt_pct(pricing['term_discount'])})",
+            -pricing["gross_bps"] * pricing["term_discount"] * 0.5,
+            THEME["green"],
+        ))
+    waterfall_items.append(("Effective Rate", pricing["effective_bps"], THEME["green"]))
+
+    fig = go.Figure(go.Waterfall(
+        x=[w[0] for w in waterfall_items],
+        y=[w[1] for w in waterfall_items],
+        measure=["absolute"] + ["relative"] * (len(waterfall_items) - 2) + ["total"],
+        textposition="outside",
+        text=[f"{abs(w[1]):.2f}" for w in waterfall_items],
+        connector=dict(line=dict(color=THEME["border"])),
+        increasing=dict(marker=dict(color=THEME["green"])),
+        decreasing=dict(marker=dict(color=THEME["red"])),
+        totals=dict(marker=dict(color=THEME["green"])),
+    ))
+    fig.update_layout(title="Fee Rate Waterfall (bps)", showlegend=False)
+    return plotly_dark_layout(fig, height=380)
+
+@st.cache_data
+def donut_fig(labels, values, title, height=320, hole=0.4, textinfo=None):
+    """Shared donut-chart builder (service mix, AUM/revenue allocation)."""
+    pie_kwargs = dict(
+        labels=labels,
+        values=values,
+        hole=hole,
+        marker=dict(colors=THEME["chart_palette"][:len(labels)]),
+    )
+    if textinfo:
+        pie_kwargs.update(textinfo=textinfo, textfont=dict(size=11))
+    fig = go.Figure(go.Pie(**pie_kwargs))
+    fig.update_layout(title=title)
+    return plotly_dark_layout(fig, height=height)
+
+@st.cache_data
+def revenue_cost_fig(revenue_mn: float, cost_mn: float) -> go.Figure:
+    """Annual revenue-vs-cost bar for tab 1; memoized on the two totals."""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=["Revenue", "Cost"],
+        y=[revenue_mn, cost_mn],
+        marker_color=[THEME["green"], THEME["red"]],
+        text=[fmt_usd(revenue_mn), fmt_usd(cost_mn)],
+        textposition="outside",
+    ))
+    fig.update_layout(title="Annual Economics ($M)", yaxis_title="$M")
+    return plotly_dark_layout(fig, height=340)
+
 # ──────────────────────────────────────────────────────────────────────
 # HEADER
 # ──────────────────────────────────────────────────────────────────────
@@ -385,17 +554,13 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 🧩 Service Modules")
 
-    # Required services are always on
-    required = [k for k, v in SERVICE_MODULES.items() if v["required"]]
-    optional = [k for k, v in SERVICE_MODULES.items() if not v["required"]]
-
     selected_optional = st.multiselect(
         "Optional Services",
-        options=optional,
+        options=OPTIONAL_SERVICES,
         default=["Transfer Agency", "Client Reporting"],
         help="Required services (NAV, Compliance) are always included.",
     )
-    selected_services = required + selected_optional
+    selected_services = REQUIRED_SERVICES + selected_optional
 
     # Show selected services with rates
     for svc in selected_services:
@@ -473,42 +638,7 @@ with tab1:
     # ── Discount Waterfall ────────────────────────────────────────────
     section_header("📉", "Discount Waterfall")
 
-    waterfall_items = [
-        ("Gross Rate", pricing["gross_bps"], THEME["muted"]),
-        (f"Volume Discount ({fmt_pct(pricing['volume_discount'])})",
-         -pricing["gross_bps"] * pricing["volume_discount"], THEME["cyan"]),
-        (f"Negotiation ({fmt_pct(pricing['nego_discount'])})",
-         -pricing["gross_bps"] * (1 - pricing["volume_discount"]) * pricing["nego_discount"],
-         THEME["amber"]),
-    ]
-    if custom_discount > 0:
-        waterfall_items.append((
-            f"Custom ({custom_discount}%)",
-            -pricing["gross_bps"] * (custom_discount / 100) * 0.5,
-            THEME["purple"],
-        ))
-    if pricing["term_discount"] > 0:
-        waterfall_items.append((
-            f"Term Discount ({fmt_pct(pricing['term_discount'])})",
-            -pricing["gross_bps"] * pricing["term_discount"] * 0.5,
-            THEME["green"],
-        ))
-    waterfall_items.append(("Effective Rate", pricing["effective_bps"], THEME["green"]))
-
-    fig_wf = go.Figure(go.Waterfall(
-        x=[w[0] for w in waterfall_items],
-        y=[w[1] for w in waterfall_items],
-        measure=["absolute"] + ["relative"] * (len(waterfall_items) - 2) + ["total"],
-        textposition="outside",
-        text=[f"{abs(w[1]):.2f}" for w in waterfall_items],
-        connector=dict(line=dict(color=THEME["border"])),
-        increasing=dict(marker=dict(color=THEME["green"])),
-        decreasing=dict(marker=dict(color=THEME["red"])),
-        totals=dict(marker=dict(color=THEME["green"])),
-    ))
-    fig_wf.update_layout(title="Fee Rate Waterfall (bps)", showlegend=False)
-    plotly_dark_layout(fig_wf, height=380)
-    st.plotly_chart(fig_wf, use_container_width=True)
+    st.plotly_chart(discount_waterfall_fig(pricing, custom_discount), use_container_width=True)
 
     # ── Service Breakdown ─────────────────────────────────────────────
     col_left, col_right = st.columns(2)
@@ -516,37 +646,25 @@ with tab1:
     with col_left:
         section_header("🧩", "Fee Composition by Service")
         svc_df = pd.DataFrame(pricing["service_breakdown"])
-        fig_pie = go.Figure(go.Pie(
-            labels=svc_df["service"],
-            values=svc_df["adjusted_bps"],
-            hole=0.45,
-            marker=dict(colors=THEME["chart_palette"][:len(svc_df)]),
-            textinfo="label+percent",
-            textfont=dict(size=11),
-        ))
-        fig_pie.update_layout(title="Adjusted bps by Service")
-        plotly_dark_layout(fig_pie, height=340)
+        fig_pie = donut_fig(svc_df["service"], svc_df["adjusted_bps"],
+                            "Adjusted bps by Service", height=340, hole=0.45,
+                            textinfo="label+percent")
         st.plotly_chart(fig_pie, use_container_width=True)
 
     with col_right:
         section_header("💰", "Revenue vs Cost")
-        fig_econ = go.Figure()
-        fig_econ.add_trace(go.Bar(
-            x=["Revenue", "Cost"],
-            y=[pricing["annual_revenue_mn"], pricing["annual_cost_mn"]],
-            marker_color=[THEME["green"], THEME["red"]],
-            text=[fmt_usd(pricing["annual_revenue_mn"]), fmt_usd(pricing["annual_cost_mn"])],
-            textposition="outside",
-        ))
-        fig_econ.update_layout(title="Annual Economics ($M)", yaxis_title="$M")
-        plotly_dark_layout(fig_econ, height=340)
+        fig_econ = revenue_cost_fig(pricing["annual_revenue_mn"], pricing["annual_cost_mn"])
         st.plotly_chart(fig_econ, use_container_width=True)
 
     # ── Service detail table ──────────────────────────────────────────
     with st.expander("📊 Detailed Service Breakdown"):
-        detail_df = pd.DataFrame(pricing["service_breakdown"])
-        detail_df.columns = ["Service", "Base Rate (bps)", "Adjusted Rate (bps)"]
-        detail_df["Adjusted Rate (bps)"] = detail_df["Adjusted Rate (bps)"].round(3)
+        detail_df = (
+            pd.DataFrame(pricing["service_breakdown"])
+            .rename(columns={"service": "Service",
+                             "base_bps": "Base Rate (bps)",
+                             "adjusted_bps": "Adjusted Rate (bps)"})
+            .assign(**{"Adjusted Rate (bps)": lambda d: d["Adjusted Rate (bps)"].round(3)})
+        )
         st.dataframe(detail_df, use_container_width=True, hide_index=True)
 
 # ══════════════════════════════════════════════════════════════════════
@@ -563,18 +681,8 @@ with tab2:
     )
 
     aum_points = [50, 100, 250, 500, 750, 1000, 1500, 2000, 3000, 5000, 7500, 10000, 15000, 20000, 25000]
-    sensitivity_data = []
-    for a in aum_points:
-        p = calculate_pricing(fund_type, a, selected_services, scenario,
-                              custom_discount, share_classes, nav_frequency, term_years)
-        sensitivity_data.append({
-            "AUM ($M)": a,
-            "Annual Revenue ($M)": round(p["annual_revenue_mn"], 4),
-            "Effective Rate (bps)": round(p["effective_bps"], 3),
-            "Margin": round(p["margin"], 4),
-            "Headcount": p["headcount"],
-        })
-    sens_df = pd.DataFrame(sensitivity_data)
+    sens_df = sensitivity_frame(fund_type, aum_points, selected_services, scenario,
+                                custom_discount, share_classes, nav_frequency, term_years)
 
     # Revenue & Rate chart
     section_header("📈", "Revenue & Effective Rate by AUM")
@@ -628,17 +736,10 @@ with tab2:
 
     # Volume tier table
     section_header("🏷️", "Volume Discount Schedule")
-    tier_data = []
-    for lo, hi, disc in VOLUME_TIERS:
-        hi_label = f"${hi/1000:.0f}B" if hi >= 1000 and hi < 1e9 else (f"${hi:.0f}M" if hi < 1000 else "∞")
-        lo_label = f"${lo/1000:.0f}B" if lo >= 1000 else f"${lo:.0f}M"
-        current = "◀ CURRENT" if lo <= aum_mn < hi else ""
-        tier_data.append({
-            "AUM Range": f"{lo_label} – {hi_label}",
-            "Volume Discount": f"{disc*100:.0f}%" if disc > 0 else "—",
-            "Status": current,
-        })
-    st.dataframe(pd.DataFrame(tier_data), use_container_width=True, hide_index=True)
+    tier_df = pd.DataFrame(VOLUME_TIER_ROWS, columns=["AUM Range", "Volume Discount"])
+    current_tier = int(np.searchsorted(VOLUME_TIER_EDGES, aum_mn, side="right"))
+    tier_df["Status"] = ["◀ CURRENT" if i == current_tier else "" for i in range(len(tier_df))]
+    st.dataframe(tier_df, use_container_width=True, hide_index=True)
 
     with st.expander("📋 Full Sensitivity Data Table"):
         st.dataframe(sens_df, use_container_width=True, hide_index=True)
@@ -664,30 +765,8 @@ with tab3:
                               custom_discount, share_classes, nav_frequency, term_years)
         scenario_results[sc_name] = p
 
-    # Scenario cards
-    cols = st.columns(4)
-    for i, (sc_name, sc_info) in enumerate(NEGOTIATION_SCENARIOS.items()):
-        p = scenario_results[sc_name]
-        with cols[i]:
-            border_color = sc_info["color"]
-            st.markdown(f"""
-            <div style="background:#111827; border:1px solid #1e293b; border-top:3px solid {border_color};
-                        border-radius:10px; padding:18px; text-align:center;">
-                <div style="font-size:0.85rem; font-weight:700; color:{border_color}; margin-bottom:10px;">
-                    {sc_name}
-                </div>
-                <div style="font-size:1.4rem; font-weight:700; color:#e2e8f0;
-                            font-family:'JetBrains Mono',monospace; margin-bottom:4px;">
-                    {fmt_usd(p['annual_revenue_mn'])}
-                </div>
-                <div style="font-size:0.78rem; color:#94a3b8; margin-bottom:6px;">
-                    {fmt_bps(p['effective_bps'])} · {fmt_pct(p['margin'])} margin
-                </div>
-                <div style="font-size:0.72rem; color:#64748b;">
-                    Contract: {fmt_usd(p['contract_value_mn'])}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+    # Scenario cards (single element; see scenario_cards_html)
+    st.markdown(scenario_cards_html(scenario_results), unsafe_allow_html=True)
 
     st.markdown("")
 
@@ -754,7 +833,10 @@ with tab3:
 # TAB 4: PORTFOLIO VIEW
 # ══════════════════════════════════════════════════════════════════════
 
-with tab4:
+@st.fragment
+def render_portfolio_tab():
+    """Portfolio View body, scoped as a fragment so add/remove interactions
+    rerun only this block instead of the whole script."""
     narrative(
         "<strong>Portfolio View:</strong> This shows blended economics across a "
         "multi-fund client relationship. Individual fund margins vary, but the "
@@ -794,10 +876,8 @@ with tab4:
             new_term = st.number_input("Term (yrs)", min_value=1, max_value=10, value=3, key="new_term")
 
         new_scenario = st.selectbox("Scenario", list(NEGOTIATION_SCENARIOS.keys()), key="new_scenario")
-        required_svcs = [k for k, v in SERVICE_MODULES.items() if v["required"]]
-        optional_svcs = [k for k, v in SERVICE_MODULES.items() if not v["required"]]
-        new_optional = st.multiselect("Optional Services", optional_svcs, default=["Transfer Agency"], key="new_svcs")
-        new_services = required_svcs + new_optional
+        new_optional = st.multiselect("Optional Services", OPTIONAL_SERVICES, default=["Transfer Agency"], key="new_svcs")
+        new_services = REQUIRED_SERVICES + new_optional
 
         if st.button("➕ Add to Portfolio", type="primary"):
             st.session_state.portfolio.append({
@@ -807,19 +887,19 @@ with tab4:
             })
             st.rerun()
 
-    # Compute portfolio pricing
-    port_results = []
-    for fund in portfolio:
-        p = calculate_pricing(
-            fund["type"], fund["aum"], fund["services"], fund["scenario"],
-            0.0, fund["classes"], fund["freq"], fund["term"],
-        )
-        port_results.append({"fund": fund, "pricing": p})
+    if not portfolio:
+        st.info("Portfolio is empty — add a fund above.")
+        return
+
+    # Compute portfolio pricing (cached until the portfolio changes)
+    port_results = price_portfolio(portfolio)
+    funds_df = pd.DataFrame([pr["fund"] for pr in port_results])
+    prices_df = pd.DataFrame([pr["pricing"] for pr in port_results])
 
-    total_aum = sum(f["fund"]["aum"] for f in port_results)
-    total_rev = sum(f["pricing"]["annual_revenue_mn"] for f in port_results)
-    total_cost = sum(f["pricing"]["annual_cost_mn"] for f in port_results)
-    total_contract = sum(f["pricing"]["contract_value_mn"] for f in port_results)
+    total_aum = funds_df["aum"].sum()
+    total_rev, total_cost, total_contract = prices_df[
+        ["annual_revenue_mn", "annual_cost_mn", "contract_value_mn"]
+    ].sum()
     blended_bps = (total_rev / total_aum * 10_000) if total_aum > 0 else 0
     blended_margin = (total_rev - total_cost) / total_rev if total_rev > 0 else 0
 
@@ -836,20 +916,17 @@ with tab4:
 
     # Fund detail table
     section_header("📋", "Fund-Level Detail")
-    table_data = []
-    for pr in port_results:
-        f, p = pr["fund"], pr["pricing"]
-        table_data.append({
-            "Fund": f["name"],
-            "Type": f["type"],
-            "AUM": fmt_usd(f["aum"]),
-            "Eff. Rate": fmt_bps(p["effective_bps"]),
-            "Revenue": fmt_usd(p["annual_revenue_mn"]),
-            "Margin": fmt_pct(p["margin"]),
-            "Term": f"{f['term']}Y",
-            "Scenario": f["scenario"],
-        })
-    st.dataframe(pd.DataFrame(table_data), use_container_width=True, hide_index=True)
+    fund_table = pd.DataFrame({
+        "Fund": funds_df["name"],
+        "Type": funds_df["type"],
+        "AUM": funds_df["aum"].map(fmt_usd),
+        "Eff. Rate": prices_df["effective_bps"].map(fmt_bps),
+        "Revenue": prices_df["annual_revenue_mn"].map(fmt_usd),
+        "Margin": prices_df["margin"].map(fmt_pct),
+        "Term": funds_df["term"].astype(str) + "Y",
+        "Scenario": funds_df["scenario"],
+    })
+    st.dataframe(fund_table, use_container_width=True, hide_index=True)
 
     # Revenue composition chart
     section_header("📊", "Revenue & Cost Composition")
@@ -874,24 +951,16 @@ with tab4:
     col_p1, col_p2 = st.columns(2)
     with col_p1:
         section_header("🥧", "AUM Allocation")
-        fig_aum_pie = go.Figure(go.Pie(
-            labels=fund_names,
-            values=[pr["fund"]["aum"] for pr in port_results],
-            hole=0.4, marker=dict(colors=THEME["chart_palette"][:len(fund_names)]),
-        ))
-        fig_aum_pie.update_layout(title="AUM Distribution")
-        plotly_dark_layout(fig_aum_pie, height=320)
+        fig_aum_pie = donut_fig(fund_names,
+                                [pr["fund"]["aum"] for pr in port_results],
+                                "AUM Distribution")
         st.plotly_chart(fig_aum_pie, use_container_width=True)
 
     with col_p2:
         section_header("🥧", "Revenue Contribution")
-        fig_rev_pie = go.Figure(go.Pie(
-            labels=fund_names,
-            values=[pr["pricing"]["annual_revenue_mn"] for pr in port_results],
-            hole=0.4, marker=dict(colors=THEME["chart_palette"][:len(fund_names)]),
-        ))
-        fig_rev_pie.update_layout(title="Revenue Distribution")
-        plotly_dark_layout(fig_rev_pie, height=320)
+        fig_rev_pie = donut_fig(fund_names,
+                                [pr["pricing"]["annual_revenue_mn"] for pr in port_results],
+                                "Revenue Distribution")
         st.plotly_chart(fig_rev_pie, use_container_width=True)
 
     # Remove funds
@@ -906,6 +975,9 @@ with tab4:
                 st.session_state.portfolio.pop(remove_idx)
                 st.rerun()
 
+with tab4:
+    render_portfolio_tab()
+
 # ──────────────────────────────────────────────────────────────────────
 # FOOTER
 # ──────────────────────────────────────────────────────────────────────